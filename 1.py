@@ -1,8 +1,15 @@
 import tkinter as tk # Not used in this version, but kept as per original
+import sys # Command-line flags (e.g. --validate-maps)
 import pygame
-import os # Not used in this snippet directly, but often useful
+import os # Map files for development-mode hot-reload
 import time # Used for blinking cursor effect
 import random # For potential future use (e.g., NPC movement)
+import json # Telemetry event serialization
+import threading # Background telemetry flushing
+from collections import deque # Ring buffer for telemetry events
+from concurrent.futures import ThreadPoolExecutor # Background neighbour map preparation
+import socket # Multiplayer world server and bot clients
+import selectors # Non-blocking socket multiplexing for the world server
 
 # --- Game Constants ---
 SCREEN_WIDTH = 800
@@ -17,6 +24,30 @@ VIEWPORT_HEIGHT_TILES = GAME_AREA_HEIGHT // TILE_SIZE
 
 FPS = 60 # Target 60 frames per second, similar to GBA refresh rates
 MAX_PLAYER_NAME_LENGTH = 7 # Typical Pokemon name length
+NEIGHBOR_PREFETCH_DISTANCE = 16 # Tiles from a connected edge at which the neighbouring map is prepared in the background
+MAP_CHUNK_TILES = 16 # Maps are pre-rendered in square chunks of this many tiles; only chunks in view are drawn
+MAP_CHUNK_CACHE_SIZE = 24 # Rendered chunks kept per map; those farthest from view are dropped first
+
+# --- Telemetry (Gameplay event log written off the render thread) ---
+TELEMETRY_LOG_PATH = "telemetry.jsonl" # JSON Lines output file; None disables telemetry
+TELEMETRY_BUFFER_SIZE = 4096 # Ring buffer capacity; the oldest events are dropped when full
+TELEMETRY_FLUSH_INTERVAL = 0.5 # Seconds between background flushes
+TELEMETRY_SAMPLE_RATES = { # Fraction of events kept per event type (unlisted types keep all)
+    "player_action": 1.0,
+    "map_changed": 1.0,
+}
+
+# --- Multiplayer (Authoritative world server over localhost TCP) ---
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7777
+SERVER_TICK_RATE = 20 # Fixed simulation ticks per second
+SERVER_MAX_BUFFER_BYTES = 256 * 1024 # Clients whose unsent data exceeds this are dropped
+SERVER_MAX_MESSAGE_BYTES = 256 # Clients sending a longer line are dropped (a move message is under 20 bytes)
+
+# --- Development Mode (Map hot-reload from external files, enabled with --dev) ---
+MAP_DIR = "maps" # Directory of <map_id>.map files that override the built-in map data
+MAP_FILE_EXTENSION = ".map"
+MAP_WATCH_INTERVAL = 0.25 # Seconds between polls of MAP_DIR for changed files
 
 # --- Colors (Gen 3 Inspired - simplified) ---
 WHITE = (255, 255, 255)
@@ -55,6 +86,7 @@ C_BUTTON_TEXT = WHITE
 C_TEXT_INPUT_BG = (60, 60, 60) # Background for name input field
 C_TEXT_INPUT_BORDER = (120, 120, 120) # Border for name input field
 C_CURSOR = (220, 220, 20) # Custom mouse cursor color
+C_MAP_PLACEHOLDER = C_TREE_LEAVES # Drawn in place of a neighbouring map that is still being prepared
 
 # --- Tile Types (Numeric identifiers for different map elements) ---
 T_PATH_GRASS = 0
@@ -87,6 +119,36 @@ T_ROOF_MART = 28
 T_NPC_SPAWN = 98 # Marker for NPC positions in map data
 T_PLAYER_SPAWN = 99 # Marker for initial player start position
 
+# --- Tile Colors (Flat color used to draw each tile type; unknown tiles are drawn black) ---
+TILE_COLORS = {
+    T_PATH_GRASS: C_PATH_GRASS,
+    T_GRASS_REGULAR: C_GRASS_REGULAR,
+    T_TALL_GRASS: C_TALL_GRASS,
+    T_TREE: C_TREE_LEAVES,
+    T_WATER: C_WATER,
+    T_FLOWER_RED: C_FLOWER_RED,
+    T_FLOWER_YELLOW: C_FLOWER_YELLOW,
+    T_FENCE: C_FENCE,
+    T_LEDGE_JUMP_DOWN: C_LEDGE,
+    T_BUILDING_WALL: C_BUILDING_WALL_LIGHT, # Generic wall
+    T_PLAYER_HOUSE_WALL: C_BUILDING_WALL_LIGHT,
+    T_RIVAL_HOUSE_WALL: C_BUILDING_WALL_LIGHT,
+    T_LAB_WALL: C_BUILDING_WALL_LIGHT,
+    T_PC_WALL: C_PC_WALL,
+    T_MART_WALL: C_MART_WALL,
+    T_PLAYER_HOUSE_DOOR: C_DOOR,
+    T_RIVAL_HOUSE_DOOR: C_DOOR,
+    T_LAB_DOOR: C_DOOR,
+    T_PC_DOOR: C_DOOR,
+    T_MART_DOOR: C_DOOR,
+    T_ROOF_PLAYER: C_ROOF_RED,
+    T_ROOF_RIVAL: C_ROOF_RED,
+    T_ROOF_LAB: C_ROOF_GRAY, # Generic roof
+    T_ROOF_PC: C_ROOF_GRAY,
+    T_ROOF_MART: C_ROOF_MART,
+    T_SIGN: C_SIGN,
+}
+
 # --- Map IDs (String identifiers for different game maps) ---
 MAP_LITTLEROOT = "littleroot_town"
 MAP_ROUTE_101 = "route_101"
@@ -103,6 +165,14 @@ TRE, PTH, SGN, FNC, WTR, TLG, FLR, FLY, LJD, NSP, PSP = \
     T_TREE, T_PATH_GRASS, T_SIGN, T_FENCE, T_WATER, T_TALL_GRASS, \
     T_FLOWER_RED, T_FLOWER_YELLOW, T_LEDGE_JUMP_DOWN, T_NPC_SPAWN, T_PLAYER_SPAWN
 GRS = T_GRASS_REGULAR
+# Shorthand names as written in external map files
+TILE_SHORTHANDS = {
+    "PHW": PHW, "PHD": PHD, "RHW": RHW, "RHD": RHD, "LBW": LBW, "LBD": LBD,
+    "PCW": PCW, "PCD": PCD, "MRW": MRW, "MRD": MRD,
+    "RPL": RPL, "RRV": RRV, "RLB": RLB, "RPC": RPC, "RMR": RMR,
+    "TRE": TRE, "PTH": PTH, "SGN": SGN, "FNC": FNC, "WTR": WTR, "TLG": TLG,
+    "FLR": FLR, "FLY": FLY, "LJD": LJD, "NSP": NSP, "PSP": PSP, "GRS": GRS,
+}
 
 # --- Map Data (Defines the layout of each map using tile type constants) ---
 # Littleroot Town Map Data
@@ -181,6 +251,163 @@ oldale_town_map_data = [
     [TRE, TRE, TRE, TRE, TRE, TRE, TRE, TRE, TRE, PTH, PTH, PTH, PTH, PTH, TRE, TRE, TRE, TRE, TRE, TRE, TRE, TRE, TRE, TRE, TRE],
 ]
 
+# --- Map Connections (Edge spans that lead from one map into its neighbour) ---
+# Each entry is (edge, span_start, span_end, target_map_id, target_span_start).
+# Walking off `edge` while standing within [span_start, span_end] (x for north/south,
+# y for east/west) places the player on the opposite edge of the target map,
+# keeping the same offset along the span.
+MAP_CONNECTIONS = {
+    MAP_LITTLEROOT: [("north", 11, 15, MAP_ROUTE_101, 5)],
+    MAP_ROUTE_101: [("south", 5, 9, MAP_LITTLEROOT, 11), ("north", 5, 9, MAP_OLDALE, 9)],
+    MAP_OLDALE: [("south", 9, 13, MAP_ROUTE_101, 5)],
+}
+
+# --- Sign Texts (Per-map sign messages keyed by tile position) ---
+# Maps listed here only show text for the listed signs; signs on other maps use the default text.
+SIGN_MESSAGES = {
+    MAP_LITTLEROOT: {
+        (3, 6): "LITTLEROOT TOWN\nA town that can't be shaded any hue.",
+        (22, 6): "ROUTE 101 ahead.\nTall grass! Wild Pokémon live there!",
+    },
+    MAP_OLDALE: {
+        (15, 2): "OLDALE TOWN\nWhere things get started.",
+        (10, 12): "North: Route 103 (Not Implemented)\nWest: Petalburg Woods (Not Implemented)",
+    },
+}
+DEFAULT_SIGN_MESSAGE = "It's a wooden sign."
+DOOR_TILES = (T_PLAYER_HOUSE_DOOR, T_RIVAL_HOUSE_DOOR, T_LAB_DOOR, T_PC_DOOR, T_MART_DOOR)
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0)) # Single-tile steps as (dx, dy): up, down, left, right
+
+def make_map_info(map_data):
+    """Wraps tile rows into a map registry entry with its dimensions."""
+    return {'data': map_data, 'width': len(map_data[0]) if map_data else 0, 'height': len(map_data)}
+
+def build_maps_data():
+    """Builds the map registry (tile data plus dimensions) keyed by map ID."""
+    return {
+        MAP_LITTLEROOT: make_map_info(littleroot_town_map_data),
+        MAP_ROUTE_101: make_map_info(route_101_map_data),
+        MAP_OLDALE: make_map_info(oldale_town_map_data),
+    }
+
+def load_maps_data():
+    """Builds the map registry with any MAP_DIR files applied; returns (maps_data, load errors)."""
+    maps_data = build_maps_data()
+    _, errors = load_map_files(maps_data)
+    return maps_data, errors
+
+def map_file_path(map_id, map_dir=MAP_DIR):
+    """Returns the external file that overrides map_id in development mode."""
+    return os.path.join(map_dir, map_id + MAP_FILE_EXTENSION)
+
+def parse_map_file(text):
+    """Parses map file text: one row per line, tiles as shorthand names or numbers.
+
+    Tiles may be separated by commas and/or whitespace; '#' starts a comment.
+    Raises ValueError on unknown tile names or an empty map.
+    """
+    rows = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        tokens = line.split("#", 1)[0].replace(",", " ").split()
+        if not tokens:
+            continue
+        row = []
+        for token in tokens:
+            if token in TILE_SHORTHANDS:
+                row.append(TILE_SHORTHANDS[token])
+            elif token.isdigit():
+                row.append(int(token))
+            else:
+                raise ValueError(f"line {line_number}: unknown tile '{token}'")
+        rows.append(row)
+    if not rows:
+        raise ValueError("map file has no rows")
+    return rows
+
+def format_map_file(map_data):
+    """Formats tile rows in the map file format, using shorthand names where they exist."""
+    names = {tile: name for name, tile in TILE_SHORTHANDS.items()}
+    return "".join(", ".join(names.get(tile, str(tile)) for tile in row) + "\n" for row in map_data)
+
+def load_map_files(maps_data, map_dir=MAP_DIR):
+    """Replaces built-in maps with any matching files in map_dir.
+
+    Returns (IDs loaded, error messages); maps whose file fails to load keep the built-in data.
+    """
+    loaded, errors = [], []
+    for map_id in maps_data:
+        path = map_file_path(map_id, map_dir)
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, encoding="utf-8") as map_file:
+                maps_data[map_id] = make_map_info(parse_map_file(map_file.read()))
+            loaded.append(map_id)
+        except (OSError, ValueError) as error:
+            errors.append(f"Could not load map file {path}: {error}")
+            print(f"Warning: {errors[-1]}. Using built-in map.")
+    return loaded, errors
+
+def export_maps_main():
+    """Command-line entry point: writes the built-in maps to MAP_DIR as editable map files."""
+    os.makedirs(MAP_DIR, exist_ok=True)
+    for map_id, map_info in build_maps_data().items():
+        path = map_file_path(map_id)
+        if os.path.exists(path):
+            print(f"Skipping {path}: already exists.")
+            continue
+        with open(path, "w", encoding="utf-8") as map_file:
+            map_file.write(format_map_file(map_info['data']))
+        print(f"Wrote {path}")
+    return 0
+
+class MapWatcher:
+    """Polls MAP_DIR for changed map files on a background thread (development mode).
+
+    Only file modification times are checked each poll; the IDs of changed maps are
+    queued in `changed` for the game loop to reload on the main thread.
+    """
+    def __init__(self, map_ids, map_dir=MAP_DIR, interval=MAP_WATCH_INTERVAL):
+        self.map_ids = set(map_ids)
+        self.map_dir = map_dir
+        self.interval = interval
+        self.changed = deque() # Map IDs waiting to be reloaded
+        self._mtimes = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.scan() # Record current modification times without reporting them
+
+    def scan(self):
+        """Checks every map file once and returns the IDs whose modification time changed."""
+        changed = []
+        for map_id in self.map_ids:
+            try:
+                mtime = os.stat(map_file_path(map_id, self.map_dir)).st_mtime_ns
+            except OSError:
+                mtime = None # Missing files are not reloaded (the built-in map stays)
+            if mtime != self._mtimes.get(map_id):
+                self._mtimes[map_id] = mtime
+                if mtime is not None:
+                    changed.append(map_id)
+        return changed
+
+    def start(self):
+        """Starts polling on a daemon thread."""
+        self.changed.clear()
+        self._thread = threading.Thread(target=self._run, name="map-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.changed.extend(self.scan())
+
+    def stop(self):
+        """Stops the polling thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
 # --- Game States (Manages different phases of the game, like intro, gameplay, menus, etc.) ---
 STATE_INTRO_WELCOME = 0         # Initial welcome screen
 STATE_INTRO_PROF_SPEECH = 1     # Professor's introductory dialogue
@@ -189,6 +416,87 @@ STATE_INTRO_NAME_INPUT = 3      # Player inputs their name
 STATE_GAMEPLAY = 4              # Main game exploration mode
 STATE_TRANSITION_TO_GAME = 5    # Brief state for final message before gameplay
 
+class TelemetryLogger:
+    """Structured event logger that keeps file I/O off the render thread.
+
+    log() only samples and appends a tuple to a bounded deque (atomic in CPython,
+    so the game thread never takes a lock). A daemon thread drains the buffer in
+    batches and writes one JSON object per line. Events dropped because the
+    buffer was full are written out as a "telemetry_dropped" event.
+    """
+    def __init__(self, path, buffer_size=TELEMETRY_BUFFER_SIZE, flush_interval=TELEMETRY_FLUSH_INTERVAL, sample_rates=None):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.sample_rates = dict(TELEMETRY_SAMPLE_RATES if sample_rates is None else sample_rates)
+        self.enabled = False # Set by start() once the output file is open
+        self.dropped = 0 # Events lost because the buffer was full when they arrived
+        self._dropped_reported = 0 # Part of `dropped` already written to the file
+        self._buffer = deque(maxlen=buffer_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._file = None
+
+    def start(self):
+        """Opens the output file and starts the background flush thread."""
+        if self.path is None or self._thread:
+            return
+        try:
+            self._file = open(self.path, "a", encoding="utf-8")
+        except OSError as error:
+            print(f"Warning: Could not open telemetry log {self.path}: {error}. Telemetry disabled.")
+            return
+        self.enabled = True
+        self._thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+        self._thread.start()
+
+    def log(self, event_type, **fields):
+        """Records an event; cheap enough to call from the game loop."""
+        if not self.enabled:
+            return
+        rate = self.sample_rates.get(event_type, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return # Sampled out
+        if len(self._buffer) == self.buffer_size:
+            self.dropped += 1 # deque drops the oldest event on append
+        self._buffer.append((time.time(), event_type, fields))
+
+    def flush(self):
+        """Writes all buffered events to the output file. Called from the flush thread."""
+        if self._file is None:
+            return
+        lines = []
+        buffer = self._buffer
+        while buffer:
+            timestamp, event_type, fields = buffer.popleft()
+            record = {"t": round(timestamp, 3), "event": event_type}
+            record.update(fields)
+            lines.append(json.dumps(record, ensure_ascii=False))
+        dropped = self.dropped - self._dropped_reported
+        if dropped:
+            self._dropped_reported += dropped
+            lines.append(json.dumps({"t": round(time.time(), 3), "event": "telemetry_dropped", "count": dropped}))
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def _run(self):
+        """Background loop: flush a batch every flush_interval seconds until stopped."""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stops the flush thread, writes any remaining events and closes the file."""
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+        self.enabled = False
+
 class DialogueBox:
     """Handles the display and interaction of dialogue messages."""
     def __init__(self, screen, font_size=28, alt_font_size=24):
@@ -273,6 +581,19 @@ class DialogueBox:
                 return True # Input was handled by the dialogue box
         return False
 
+def draw_entity_shape(surface, screen_x, screen_y, color):
+    """Draws an entity square with its inner detail at a screen position, if visible."""
+    # Basic culling: Only draw if entity is visible within the game area
+    if screen_x + TILE_SIZE > 0 and screen_x < SCREEN_WIDTH and \
+       screen_y + TILE_SIZE > 0 and screen_y < GAME_AREA_HEIGHT:
+        rect = pygame.Rect(screen_x, screen_y, TILE_SIZE, TILE_SIZE)
+        pygame.draw.rect(surface, color, rect)
+        # Simple detail (e.g., eyes or a smaller inner square for basic representation)
+        detail_size = TILE_SIZE // 3
+        detail_offset = (TILE_SIZE - detail_size) // 2 # Center the detail
+        detail_rect = pygame.Rect(screen_x + detail_offset, screen_y + detail_offset, detail_size, detail_size)
+        pygame.draw.rect(surface, BLACK, detail_rect)
+
 class Entity:
     """Base class for game objects like Player and NPCs."""
     def __init__(self, x, y, color, game, name="Entity"):
@@ -288,16 +609,7 @@ class Entity:
         screen_x = self.x * TILE_SIZE - camera_x
         screen_y = self.y * TILE_SIZE - camera_y
 
-        # Basic culling: Only draw if entity is visible within the game area
-        if screen_x + TILE_SIZE > 0 and screen_x < SCREEN_WIDTH and \
-           screen_y + TILE_SIZE > 0 and screen_y < GAME_AREA_HEIGHT:
-            rect = pygame.Rect(screen_x, screen_y, TILE_SIZE, TILE_SIZE)
-            pygame.draw.rect(surface, self.color, rect)
-            # Simple detail (e.g., eyes or a smaller inner square for basic representation)
-            detail_size = TILE_SIZE // 3
-            detail_offset = (TILE_SIZE - detail_size) // 2 # Center the detail
-            detail_rect = pygame.Rect(screen_x + detail_offset, screen_y + detail_offset, detail_size, detail_size)
-            pygame.draw.rect(surface, BLACK, detail_rect)
+        draw_entity_shape(surface, screen_x, screen_y, self.color)
 
 class NPC(Entity):
     """Non-Player Character class."""
@@ -331,6 +643,142 @@ def is_walkable(tile_type):
     # By default, tiles are not walkable unless specified. Doors, signs, ledges are handled specially.
     return False
 
+def strip_spawn_markers(map_data):
+    """Returns a mutable copy of map_data with spawn markers replaced by path tiles.
+
+    Also returns the NPC spawn positions (row-major order) and the player spawn, if any.
+    """
+    tiles = [row[:] for row in map_data] # Deep copy for mutable map
+    npc_spawns = []
+    player_spawn = None
+    for r, row in enumerate(tiles):
+        for c, tile in enumerate(row):
+            if tile == T_PLAYER_SPAWN:
+                # Replace spawn marker with a walkable tile so the player can walk over it later
+                player_spawn = (c, r)
+                tiles[r][c] = T_PATH_GRASS
+            elif tile == T_NPC_SPAWN:
+                npc_spawns.append((c, r))
+                tiles[r][c] = T_PATH_GRASS
+    return tiles, npc_spawns, player_spawn
+
+def movement_map_state(map_info):
+    """Returns (stripped tiles, frozenset of NPC positions, player spawn) as the movement rules see a map."""
+    tiles, npc_spawns, player_spawn = strip_spawn_markers(map_info['data'])
+    return tiles, frozenset(npc_spawns), player_spawn
+
+def nearest_walkable_tile(tiles, x, y, occupied=()):
+    """Returns the walkable, unoccupied tile closest to (x, y) in steps, or None if there is none."""
+    start = (x, y)
+    seen = {start}
+    frontier = deque([start])
+    while frontier:
+        c, r = frontier.popleft()
+        if is_walkable(tiles[r][c]) and (c, r) not in occupied:
+            return c, r
+        for dx, dy in DIRECTIONS:
+            next_c, next_r = c + dx, r + dy
+            if 0 <= next_r < len(tiles) and 0 <= next_c < len(tiles[next_r]) and (next_c, next_r) not in seen:
+                seen.add((next_c, next_r))
+                frontier.append((next_c, next_r))
+    return None
+
+def find_connection(map_id, x, y, new_x, new_y, width, height):
+    """Returns the MAP_CONNECTIONS entry used when stepping from (x, y) to (new_x, new_y), if any."""
+    for connection in MAP_CONNECTIONS.get(map_id, ()):
+        edge, span_start, span_end = connection[0], connection[1], connection[2]
+        if edge == "north" and new_y < 0 and span_start <= x <= span_end: return connection
+        if edge == "south" and new_y >= height and span_start <= x <= span_end: return connection
+        if edge == "west" and new_x < 0 and span_start <= y <= span_end: return connection
+        if edge == "east" and new_x >= width and span_start <= y <= span_end: return connection
+    return None
+
+def connection_destination(maps_data, connection, x, y):
+    """Returns (map_id, x, y) where the player lands after taking a connection from (x, y)."""
+    edge, span_start, _, target_map_id, target_span_start = connection
+    target_info = maps_data[target_map_id]
+    if edge == "north": return target_map_id, (x - span_start) + target_span_start, target_info['height'] - 1
+    if edge == "south": return target_map_id, (x - span_start) + target_span_start, 0
+    if edge == "west": return target_map_id, target_info['width'] - 1, (y - span_start) + target_span_start
+    return target_map_id, 0, (y - span_start) + target_span_start
+
+def is_interactive_tile(map_id, tile_type, x, y):
+    """Checks whether bumping into a tile shows a message (doors and signs with text)."""
+    if tile_type in DOOR_TILES:
+        return True
+    if tile_type == T_SIGN:
+        return map_id not in SIGN_MESSAGES or (x, y) in SIGN_MESSAGES[map_id]
+    return False
+
+def tile_interaction_message(map_id, tile_type, x, y, player_name, rival_name):
+    """Returns the message shown when bumping into a door or sign tile, or None."""
+    if tile_type == T_PLAYER_HOUSE_DOOR: return f"{player_name}'s house. It's cozy inside!"
+    if tile_type == T_RIVAL_HOUSE_DOOR: return f"This is {rival_name}'s house."
+    if tile_type == T_LAB_DOOR: return "Professor Birch's Pokémon Lab."
+    if tile_type == T_PC_DOOR: return "It's a Pokémon Center." # Placeholder
+    if tile_type == T_MART_DOOR: return "It's a Poké Mart." # Placeholder
+    if tile_type == T_SIGN:
+        if map_id in SIGN_MESSAGES:
+            return SIGN_MESSAGES[map_id].get((x, y))
+        return DEFAULT_SIGN_MESSAGE
+    return None
+
+def resolve_move(maps_data, map_id, map_data, x, y, dx, dy, occupied=()):
+    """Applies the movement rules for a single step without any side effects.
+
+    Returns a (result, map_id, x, y) tuple with the mover's resulting position.
+    Interaction results leave the mover in place; the NPC or tile interacted with
+    is at (x + dx, y + dy). `occupied` holds the NPC positions on the current map.
+    """
+    height = len(map_data)
+    width = len(map_data[0]) if height else 0
+    new_x, new_y = x + dx, y + dy # Calculate potential new position
+
+    # --- Handle Map Transitions ---
+    # (Order: Check for map transitions before checking boundaries of the current map)
+    connection = find_connection(map_id, x, y, new_x, new_y, width, height)
+    if connection:
+        target_map_id, target_x, target_y = connection_destination(maps_data, connection, x, y)
+        return "map_changed", target_map_id, target_x, target_y
+
+    # --- Standard Movement & Collision within current map ---
+    # Check map boundaries for the new position
+    if not (0 <= new_y < height and 0 <= new_x < len(map_data[new_y])):
+        return "blocked_boundary", map_id, x, y # Tried to move off map where there's no connection
+
+    target_tile_type = map_data[new_y][new_x]
+
+    # NPCs block movement; bumping into one starts an interaction
+    if (new_x, new_y) in occupied:
+        return "interacted_npc", map_id, x, y
+
+    # Tile-based interactions (Signs, Doors). These block movement onto the tile.
+    if is_interactive_tile(map_id, target_tile_type, new_x, new_y):
+        return "interacted_tile", map_id, x, y
+
+    # Ledge Jumping Logic
+    if target_tile_type == T_LEDGE_JUMP_DOWN:
+        if dy == 1: # Moving downwards onto the ledge tile
+            landing_y = new_y + 1 # Player lands one tile BELOW the ledge
+            # Boundary check for landing spot
+            if not (0 <= landing_y < height and new_x < len(map_data[landing_y])):
+                return "blocked_ledge_fall_boundary", map_id, new_x, new_y # Left standing on the ledge tile
+            # Walkability check for landing spot
+            landing_tile_type = map_data[landing_y][new_x]
+            if not is_walkable(landing_tile_type) and landing_tile_type != T_LEDGE_JUMP_DOWN:
+                return "blocked_ledge_landing", map_id, x, y
+            return "jumped_ledge", map_id, new_x, landing_y
+        return "blocked_collision_ledge", map_id, x, y # Moving onto a ledge from sides, or upwards
+
+    # Standard walkable check for other tiles
+    if is_walkable(target_tile_type):
+        if target_tile_type == T_TALL_GRASS:
+            # Future: Implement wild Pokémon encounter logic here
+            return "moved_tall_grass", map_id, new_x, new_y
+        return "moved", map_id, new_x, new_y
+    # If not walkable and not any special interaction tile, it's a solid collision
+    return "blocked_collision_solid", map_id, x, y
+
 class Player(Entity):
     """Player character class."""
     def __init__(self, x, y, game, name="Player", gender="boy"):
@@ -343,102 +791,870 @@ class Player(Entity):
         if self.game.dialogue_box.active:
             return "blocked_dialogue" # Cannot move if dialogue is active
 
-        new_x, new_y = self.x + dx, self.y + dy # Calculate potential new position
-
-        # --- Handle Map Transitions ---
-        # (Order: Check for map transitions before checking boundaries of the current map)
-        # From Littleroot to Route 101 (North Exit)
-        if self.game.current_map_id == MAP_LITTLEROOT and new_y < 0 and 11 <= self.x <= 15:
-            self.game.change_map(MAP_ROUTE_101, (self.x - 11) + 5, self.game.maps_data[MAP_ROUTE_101]['height'] - 1)
-            return "map_changed"
-        # From Route 101 to Littleroot (South Exit)
-        elif self.game.current_map_id == MAP_ROUTE_101 and new_y >= self.game.current_map_height_tiles and 5 <= self.x <= 9:
-            self.game.change_map(MAP_LITTLEROOT, (self.x - 5) + 11, 0)
-            return "map_changed"
-        # From Route 101 to Oldale (North Exit)
-        elif self.game.current_map_id == MAP_ROUTE_101 and new_y < 0 and 5 <= self.x <= 9:
-            self.game.change_map(MAP_OLDALE, (self.x - 5) + 9, self.game.maps_data[MAP_OLDALE]['height'] - 1)
-            return "map_changed"
-        # From Oldale to Route 101 (South Exit)
-        elif self.game.current_map_id == MAP_OLDALE and new_y >= self.game.current_map_height_tiles and 9 <= self.x <= 13:
-            self.game.change_map(MAP_ROUTE_101, (self.x - 9) + 5, 0)
-            return "map_changed"
-
-        # --- Standard Movement & Collision within current map ---
-        # Check map boundaries for the new position
-        if not (0 <= new_x < self.game.current_map_width_tiles and \
-                0 <= new_y < self.game.current_map_height_tiles):
-            return "blocked_boundary" # Tried to move off map where there's no connection
-
-        target_tile_type = self.game.current_map_data[new_y][new_x]
-        
-        # Check for NPC at the target location (NPCs block movement)
-        for npc in self.game.npcs:
-            if npc.x == new_x and npc.y == new_y:
-                npc.interact(self) # Player interacts with NPC
-                return "interacted_npc" # Movement blocked by NPC
-
-        # Tile-based interactions (Signs, Doors). These usually block movement onto the tile.
-        interaction_message = None
-        rival_name_display = self.game.rival_name if hasattr(self.game, 'rival_name') else '[Rival]'
-        if target_tile_type == T_PLAYER_HOUSE_DOOR: interaction_message = f"{self.name}'s house. It's cozy inside!"
-        elif target_tile_type == T_RIVAL_HOUSE_DOOR: interaction_message = f"This is {rival_name_display}'s house."
-        elif target_tile_type == T_LAB_DOOR: interaction_message = "Professor Birch's Pokémon Lab."
-        elif target_tile_type == T_PC_DOOR: interaction_message = "It's a Pokémon Center." # Placeholder
-        elif target_tile_type == T_MART_DOOR: interaction_message = "It's a Poké Mart." # Placeholder
-        elif target_tile_type == T_SIGN:
-            if self.game.current_map_id == MAP_LITTLEROOT:
-                if new_x == 3 and new_y == 6: interaction_message = "LITTLEROOT TOWN\nA town that can't be shaded any hue."
-                elif new_x == 22 and new_y == 6: interaction_message = "ROUTE 101 ahead.\nTall grass! Wild Pokémon live there!"
-            elif self.game.current_map_id == MAP_OLDALE:
-                if new_x == 15 and new_y == 2 : interaction_message = "OLDALE TOWN\nWhere things get started."
-                elif new_x == 10 and new_y == 12: interaction_message = "North: Route 103 (Not Implemented)\nWest: Petalburg Woods (Not Implemented)"
-            else: interaction_message = "It's a wooden sign."
-        
-        if interaction_message:
-            self.game.dialogue_box.show_message(interaction_message)
-            return "interacted_tile" # Player interacted, movement blocked
-
-        # Ledge Jumping Logic
-        if target_tile_type == T_LEDGE_JUMP_DOWN:
-            if dy == 1: # Moving downwards onto the ledge tile
-                self.x = new_x
-                self.y = new_y + 1 # Player lands one tile BELOW the ledge
-                # Boundary check for landing spot
-                if not (0 <= self.y < self.game.current_map_height_tiles):
-                    self.y = new_y # Revert to ledge tile if landing out of bounds
-                    return "blocked_ledge_fall_boundary"
-                # Walkability check for landing spot
-                landing_tile_type = self.game.current_map_data[self.y][self.x]
-                if not is_walkable(landing_tile_type) and landing_tile_type != T_LEDGE_JUMP_DOWN:
-                     self.x -= dx # Revert x
-                     self.y = new_y -1 # Revert y to tile before ledge
-                     return "blocked_ledge_landing"
+        npcs_by_position = {(npc.x, npc.y): npc for npc in self.game.npcs}
+        result, map_id, new_x, new_y = resolve_move(self.game.maps_data, self.game.current_map_id, self.game.current_map_data,
+                                                    self.x, self.y, dx, dy, npcs_by_position)
+        target_x, target_y = self.x + dx, self.y + dy
+
+        if result == "map_changed":
+            self.game.change_map(map_id, new_x, new_y)
+        elif result == "interacted_npc":
+            npcs_by_position[(target_x, target_y)].interact(self) # Player interacts with NPC
+        elif result == "interacted_tile":
+            rival_name_display = self.game.rival_name if hasattr(self.game, 'rival_name') else '[Rival]'
+            target_tile_type = self.game.current_map_data[target_y][target_x]
+            self.game.dialogue_box.show_message(tile_interaction_message(self.game.current_map_id, target_tile_type, target_x, target_y,
+                                                                         self.name, rival_name_display))
+        else:
+            self.x, self.y = new_x, new_y
+            if result == "jumped_ledge":
                 self.game.dialogue_box.show_message("Jumped down the ledge!")
-                return "jumped_ledge"
-            else: # Trying to move onto a ledge from sides, or upwards
-                return "blocked_collision_ledge"
-
-        # Standard walkable check for other tiles
-        if is_walkable(target_tile_type):
-            self.x = new_x
-            self.y = new_y
-            if target_tile_type == T_TALL_GRASS:
-                # Future: Implement wild Pokémon encounter logic here
-                return "moved_tall_grass"
-            return "moved"
+        return result
+
+def neighbor_origin(maps_data, map_id, connection):
+    """Returns the tile offset of a connected neighbour's top-left corner relative to map_id."""
+    edge, span_start, _, target_map_id, target_span_start = connection
+    source_info, target_info = maps_data[map_id], maps_data[target_map_id]
+    shift = span_start - target_span_start # Aligns the two spans along the shared edge
+    if edge == "north": return shift, -target_info['height']
+    if edge == "south": return shift, source_info['height']
+    if edge == "west": return -target_info['width'], shift
+    return source_info['width'], shift
+
+def map_world_layout(maps_data):
+    """Places connected maps on one shared tile grid, so the camera can cross connections smoothly.
+
+    Returns (origins, bounds): origins maps map_id -> (group, x, y), the map's top-left tile
+    in the grid of its connected group, and bounds maps group -> (left, top, right, bottom).
+    """
+    neighbors = {map_id: [] for map_id in maps_data} # Connections are followed both ways
+    for map_id, connections in MAP_CONNECTIONS.items():
+        for connection in connections:
+            if map_id in maps_data and connection[3] in maps_data:
+                offset_x, offset_y = neighbor_origin(maps_data, map_id, connection)
+                neighbors[map_id].append((connection[3], offset_x, offset_y))
+                neighbors[connection[3]].append((map_id, -offset_x, -offset_y))
+    origins, bounds = {}, {}
+    for group in maps_data:
+        if group in origins:
+            continue
+        origins[group] = (group, 0, 0)
+        frontier = [group]
+        while frontier:
+            map_id = frontier.pop()
+            _, x, y = origins[map_id]
+            for target_map_id, offset_x, offset_y in neighbors[map_id]:
+                if target_map_id not in origins: # First placement wins; the validator reports disagreements
+                    origins[target_map_id] = (group, x + offset_x, y + offset_y)
+                    frontier.append(target_map_id)
+    for map_id, (group, x, y) in origins.items():
+        right, bottom = x + maps_data[map_id]['width'], y + maps_data[map_id]['height']
+        left, top, group_right, group_bottom = bounds.get(group, (x, y, right, bottom))
+        bounds[group] = (min(left, x), min(top, y), max(group_right, right), max(group_bottom, bottom))
+    return origins, bounds
+
+def camera_position(layout, map_id, player_x, player_y):
+    """Returns the camera's top-left pixel, in map_id's coordinates, centred on the player.
+
+    The camera is clamped to the combined bounds of the player's connected maps, so it
+    stops at the edge of the world but not at a connection into a neighbouring map.
+    """
+    origins, bounds = layout
+    group, origin_x, origin_y = origins[map_id]
+    left, top, right, bottom = bounds[group]
+    camera_x = (origin_x + player_x) * TILE_SIZE - SCREEN_WIDTH // 2 + TILE_SIZE // 2
+    camera_y = (origin_y + player_y) * TILE_SIZE - GAME_AREA_HEIGHT // 2 + TILE_SIZE // 2
+    camera_x = max(left * TILE_SIZE, min(camera_x, right * TILE_SIZE - SCREEN_WIDTH))
+    camera_y = max(top * TILE_SIZE, min(camera_y, bottom * TILE_SIZE - GAME_AREA_HEIGHT))
+    return camera_x - origin_x * TILE_SIZE, camera_y - origin_y * TILE_SIZE
+
+class PreparedMap:
+    """A map ready to be entered or drawn: stripped tiles, NPC spawns and pre-rendered chunks.
+
+    Tiles are rendered into MAP_CHUNK_TILES-square chunk surfaces. The background
+    map loader renders the chunks in `warm_rect` (the part the player will see
+    first); the rest are rendered when first drawn and dropped again once far out
+    of view, so memory follows what is on screen rather than the map's area.
+    """
+    def __init__(self, map_id, map_info, warm_rect=None):
+        self.map_id = map_id
+        self.width = map_info['width']
+        self.height = map_info['height']
+        self.tiles, self.npc_spawns, self.player_spawn = strip_spawn_markers(map_info['data'])
+        self.columns = max((len(row) for row in self.tiles), default=0) # Widest row, in case rows are ragged
+        self.chunks = {} # (chunk column, chunk row) -> Surface
+        if warm_rect is not None: # Tile rectangle in this map's coordinates
+            for key in self.chunk_keys(warm_rect.left * TILE_SIZE, warm_rect.top * TILE_SIZE,
+                                       warm_rect.right * TILE_SIZE, warm_rect.bottom * TILE_SIZE):
+                self.render_chunk(*key)
+
+    def chunk_keys(self, left, top, right, bottom):
+        """Returns the keys of the chunks overlapping a pixel rectangle given in map coordinates."""
+        size = MAP_CHUNK_TILES * TILE_SIZE
+        last_col = (min(right, self.columns * TILE_SIZE) - 1) // size
+        last_row = (min(bottom, len(self.tiles) * TILE_SIZE) - 1) // size
+        return [(chunk_col, chunk_row) for chunk_row in range(max(0, top // size), last_row + 1)
+                for chunk_col in range(max(0, left // size), last_col + 1)]
+
+    def render_chunk(self, chunk_col, chunk_row):
+        """Draws one chunk's tiles into its surface (created on first use) and returns it."""
+        left, top = chunk_col * MAP_CHUNK_TILES, chunk_row * MAP_CHUNK_TILES
+        chunk = self.chunks.get((chunk_col, chunk_row))
+        if chunk is None:
+            # Chunks on the right and bottom edges are cut to the map so they never cover a neighbour
+            chunk_size = (min(MAP_CHUNK_TILES, self.columns - left) * TILE_SIZE,
+                          min(MAP_CHUNK_TILES, len(self.tiles) - top) * TILE_SIZE)
+            chunk = self.chunks[(chunk_col, chunk_row)] = pygame.Surface(chunk_size)
+        chunk.fill(C_GRASS_REGULAR) # Shows through where ragged rows are short
+        for r, row in enumerate(self.tiles[top:top + MAP_CHUNK_TILES]):
+            for c, tile in enumerate(row[left:left + MAP_CHUNK_TILES]):
+                chunk.fill(TILE_COLORS.get(tile, BLACK), (c * TILE_SIZE, r * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        return chunk
+
+    def update(self, map_info):
+        """Applies a reloaded version of this map in place and returns the number of chunks redrawn.
+
+        Only rendered chunks containing a changed tile are redrawn; a size change drops all
+        chunks, which are then rendered again as they come into view.
+        """
+        tiles, self.npc_spawns, self.player_spawn = strip_spawn_markers(map_info['data'])
+        columns = max((len(row) for row in tiles), default=0)
+        dirty = set()
+        if (columns, len(tiles)) != (self.columns, len(self.tiles)):
+            self.chunks = {} # Edge chunks change size
         else:
-            # If not walkable and not any special interaction tile, it's a solid collision
-            return "blocked_collision_solid"
+            for r, (row, old_row) in enumerate(zip(tiles, self.tiles)):
+                if row == old_row:
+                    continue
+                for c in range(max(len(row), len(old_row))):
+                    if c >= len(row) or c >= len(old_row) or row[c] != old_row[c]:
+                        dirty.add((c // MAP_CHUNK_TILES, r // MAP_CHUNK_TILES))
+            dirty &= self.chunks.keys() # Chunks not rendered yet will use the new tiles when first drawn
+        self.width, self.height, self.columns, self.tiles = map_info['width'], map_info['height'], columns, tiles
+        for key in dirty:
+            self.render_chunk(*key)
+        return len(dirty)
+
+    def draw(self, surface, screen_x, screen_y, view):
+        """Blits the chunks overlapping view (a screen Rect), with the map's top-left at (screen_x, screen_y)."""
+        size = MAP_CHUNK_TILES * TILE_SIZE
+        visible = self.chunk_keys(view.left - screen_x, view.top - screen_y, view.right - screen_x, view.bottom - screen_y)
+        for chunk_col, chunk_row in visible:
+            chunk = self.chunks.get((chunk_col, chunk_row)) or self.render_chunk(chunk_col, chunk_row)
+            surface.blit(chunk, (screen_x + chunk_col * size, screen_y + chunk_row * size))
+        if visible and len(self.chunks) > MAP_CHUNK_CACHE_SIZE:
+            # Drop the chunks farthest from the ones on screen
+            center_col = sum(key[0] for key in visible) / len(visible)
+            center_row = sum(key[1] for key in visible) / len(visible)
+            by_distance = sorted(self.chunks, key=lambda key: abs(key[0] - center_col) + abs(key[1] - center_row))
+            for key in by_distance[MAP_CHUNK_CACHE_SIZE:]:
+                del self.chunks[key]
+
+class MapValidator:
+    """Offline reachability explorer that checks maps against the real movement rules.
+
+    Runs a BFS over (map_id, x, y) states using resolve_move, with NPCs as obstacles.
+    Prepared maps and per-state transitions are memoized, so repeated explorations
+    (e.g. from several start points) only pay for states not seen before.
+    """
+    # Results where the mover ends up on a new state
+    MOVE_RESULTS = ("moved", "moved_tall_grass", "jumped_ledge", "map_changed", "blocked_ledge_fall_boundary")
+
+    def __init__(self, maps_data):
+        self.maps_data = maps_data
+        self._prepared = {} # map_id -> (tiles, npc positions, player spawn)
+        self._transitions = {} # state -> (next states, interacted tiles)
+
+    def prepare(self, map_id):
+        """Returns the in-game view of a map: stripped tiles, NPC positions and player spawn."""
+        if map_id not in self._prepared:
+            self._prepared[map_id] = movement_map_state(self.maps_data[map_id])
+        return self._prepared[map_id]
+
+    def transitions(self, state):
+        """Returns the states reachable in one step from state and the tiles interacted with."""
+        if state not in self._transitions:
+            map_id, x, y = state
+            tiles, npcs, _ = self.prepare(map_id)
+            next_states, interactions = [], []
+            for dx, dy in DIRECTIONS:
+                result, new_map_id, new_x, new_y = resolve_move(self.maps_data, map_id, tiles, x, y, dx, dy, npcs)
+                if result in self.MOVE_RESULTS and new_map_id in self.maps_data:
+                    if (new_map_id, new_x, new_y) != state:
+                        next_states.append((new_map_id, new_x, new_y))
+                elif result == "interacted_tile":
+                    interactions.append((map_id, x + dx, y + dy))
+            self._transitions[state] = (tuple(next_states), tuple(interactions))
+        return self._transitions[state]
+
+    def explore(self, start):
+        """BFS from a start state; returns (reachable states, interacted tiles, reverse edges)."""
+        visited = {start}
+        interacted = set()
+        reverse_edges = {}
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                next_states, interactions = self.transitions(state)
+                interacted.update(interactions)
+                for next_state in next_states:
+                    reverse_edges.setdefault(next_state, []).append(state)
+                    if next_state not in visited:
+                        visited.add(next_state)
+                        next_frontier.append(next_state)
+            frontier = next_frontier
+        return visited, interacted, reverse_edges
+
+    def find_start(self):
+        """Returns the first player spawn found across all maps as a (map_id, x, y) state."""
+        for map_id in self.maps_data:
+            player_spawn = self.prepare(map_id)[2]
+            if player_spawn:
+                return (map_id, player_spawn[0], player_spawn[1])
+        return None
+
+    def check_connections(self):
+        """Checks every connection span for landings off the map, on solid tiles or on NPCs."""
+        problems = []
+        for map_id, connections in MAP_CONNECTIONS.items():
+            if map_id not in self.maps_data:
+                continue
+            for connection in connections:
+                edge, span_start, span_end, target_map_id = connection[:4]
+                if target_map_id not in self.maps_data:
+                    problems.append((map_id, edge, None, target_map_id, None, None, "unknown target map"))
+                    continue
+                tiles, npcs, _ = self.prepare(target_map_id)
+                for offset in range(span_start, span_end + 1):
+                    x, y = (offset, 0) if edge in ("north", "south") else (0, offset)
+                    _, target_x, target_y = connection_destination(self.maps_data, connection, x, y)
+                    reason = None
+                    if not (0 <= target_y < len(tiles) and 0 <= target_x < len(tiles[target_y])):
+                        reason = "lands outside the target map"
+                    elif (target_x, target_y) in npcs:
+                        reason = "lands on an NPC"
+                    elif not is_walkable(tiles[target_y][target_x]):
+                        reason = "lands on a solid tile"
+                    if reason:
+                        problems.append((map_id, edge, offset, target_map_id, target_x, target_y, reason))
+        return problems
+
+    def check_view_jumps(self):
+        """Checks that each connection lands one step away on the shared map grid, so the view never jumps."""
+        origins = map_world_layout(self.maps_data)[0]
+        problems = []
+        for map_id, connections in MAP_CONNECTIONS.items():
+            if map_id not in self.maps_data:
+                continue
+            width, height = self.maps_data[map_id]['width'], self.maps_data[map_id]['height']
+            for connection in connections:
+                edge, span_start, _, target_map_id = connection[:4]
+                if target_map_id not in self.maps_data:
+                    continue # Already reported by check_connections
+                # The offset between the two maps is the same along the whole span, so one tile is enough
+                if edge == "north": x, y, step_x, step_y = span_start, 0, 0, -1
+                elif edge == "south": x, y, step_x, step_y = span_start, height - 1, 0, 1
+                elif edge == "west": x, y, step_x, step_y = 0, span_start, -1, 0
+                else: x, y, step_x, step_y = width - 1, span_start, 1, 0
+                _, target_x, target_y = connection_destination(self.maps_data, connection, x, y)
+                shift_x = origins[target_map_id][1] + target_x - (origins[map_id][1] + x + step_x)
+                shift_y = origins[target_map_id][2] + target_y - (origins[map_id][2] + y + step_y)
+                if shift_x or shift_y:
+                    problems.append((map_id, edge, target_map_id, shift_x, shift_y))
+        return problems
+
+    def validate(self, start=None):
+        """Explores all maps from start (default: the player spawn) and returns a report dict."""
+        report = {
+            'ragged_rows': [], 'unreachable_tiles': [], 'unreachable_interactions': [], 'signs_without_text': [],
+            'soft_locks': [], 'one_way_traps': [], 'bad_warps': self.check_connections(),
+            'view_jumps': self.check_view_jumps(),
+        }
+        for map_id, map_info in self.maps_data.items():
+            for r, row in enumerate(map_info['data']):
+                if len(row) != map_info['width']:
+                    report['ragged_rows'].append((map_id, r, len(row), map_info['width']))
+
+        start = start or self.find_start()
+        if start is None:
+            return report
+        visited, interacted, reverse_edges = self.explore(start)
+
+        for map_id in self.maps_data:
+            tiles, npcs, _ = self.prepare(map_id)
+            for r, row in enumerate(tiles):
+                for c, tile in enumerate(row):
+                    if is_walkable(tile) and (c, r) not in npcs and (map_id, c, r) not in visited:
+                        report['unreachable_tiles'].append((map_id, c, r))
+                    elif tile == T_SIGN and not is_interactive_tile(map_id, tile, c, r):
+                        report['signs_without_text'].append((map_id, c, r)) # Solid, so never "reached"
+                    elif (tile in DOOR_TILES or tile == T_SIGN) and (map_id, c, r) not in interacted:
+                        report['unreachable_interactions'].append((map_id, c, r, tile))
+
+        # States that cannot lead back to the start are one-way traps (e.g. below a ledge)
+        can_return = {start}
+        frontier = [start]
+        while frontier:
+            state = frontier.pop()
+            for previous in reverse_edges.get(state, ()):
+                if previous not in can_return:
+                    can_return.add(previous)
+                    frontier.append(previous)
+        for state in sorted(visited - can_return):
+            if self.transitions(state)[0]:
+                report['one_way_traps'].append(state)
+            else:
+                report['soft_locks'].append(state) # No move leaves this state at all
+        return report
+
+def group_positions_by_map(entries, description):
+    """Formats (map_id, x, y) entries as one line per map with a count and a short sample."""
+    positions_by_map = {}
+    for map_id, x, y in entries:
+        positions_by_map.setdefault(map_id, []).append((x, y))
+    lines = []
+    for map_id, positions in positions_by_map.items():
+        sample = ", ".join(f"({x}, {y})" for x, y in positions[:5])
+        more = f" and {len(positions) - 5} more" if len(positions) > 5 else ""
+        lines.append(f"{map_id}: {len(positions)} {description} at {sample}{more}")
+    return lines
+
+def format_validation_report(report):
+    """Formats a MapValidator report as human-readable lines."""
+    lines = []
+    for map_id, r, length, width in report['ragged_rows']:
+        lines.append(f"{map_id}: row {r} has {length} tiles, expected {width}")
+    for map_id, edge, offset, target_map_id, x, y, reason in report['bad_warps']:
+        lines.append(f"{map_id}: {edge} connection at {offset} to {target_map_id} ({x}, {y}) {reason}")
+    for map_id, edge, target_map_id, shift_x, shift_y in report['view_jumps']:
+        lines.append(f"{map_id}: {edge} connection to {target_map_id} jumps the view by ({shift_x}, {shift_y}) tiles")
+    for map_id, x, y in report['soft_locks']:
+        lines.append(f"{map_id}: soft-lock at ({x}, {y})")
+    lines.extend(group_positions_by_map(report['one_way_traps'], "one-way trap tile(s) with no way back to start"))
+    for map_id, x, y in report['signs_without_text']:
+        lines.append(f"{map_id}: sign without text at ({x}, {y})")
+    for map_id, x, y, tile in report['unreachable_interactions']:
+        kind = "sign" if tile == T_SIGN else "door"
+        lines.append(f"{map_id}: unreachable {kind} at ({x}, {y})")
+    lines.extend(group_positions_by_map(report['unreachable_tiles'], "unreachable tile(s)"))
+    return lines
+
+def validate_maps_main():
+    """Command-line entry point: validates all maps and returns a process exit code."""
+    started = time.perf_counter()
+    maps_data, load_errors = load_maps_data() # Validate the map files designers edit, not just the built-ins
+    report = MapValidator(maps_data).validate()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    lines = load_errors + format_validation_report(report)
+    for line in lines:
+        print(line)
+    print(f"Map validation finished in {elapsed_ms:.2f} ms with {len(lines)} issue(s).")
+    return 1 if lines else 0
+
+# --- Multiplayer (Authoritative world server, bot clients and load test) ---
+class RemotePlayer:
+    """Server-side state for one connected client."""
+    def __init__(self, player_id, sock, map_id, x, y):
+        self.id = player_id
+        self.sock = sock
+        self.name = f"Player{player_id}"
+        self.map_id = map_id
+        self.x = x
+        self.y = y
+        self.pending_move = None # Latest (dx, dy) received since the last tick
+        self.interest = frozenset() # Maps whose players this client was last sent
+        self.inbuf = b""
+        self.outbuf = b""
+        self.bytes_sent = 0
+
+class WorldServer:
+    """Runs the movement rules for all connected players at a fixed tick.
+
+    Clients send newline-delimited JSON ({"hello": name} or {"move": [dx, dy]}).
+    After each tick every client receives only the entities that changed since
+    what it was last sent, limited to its own map and the maps connected to it:
+    {"t": tick, "u": {id: [map_id, x, y]}, "r": [ids no longer visible]}.
+    Clients whose interest set did not change share one encoded delta per tick.
+    """
+    def __init__(self, maps_data, host=SERVER_HOST, port=SERVER_PORT, tick_rate=SERVER_TICK_RATE, start_map_id=MAP_LITTLEROOT):
+        self.maps_data = maps_data
+        self.host = host
+        self.port = port
+        self.tick_interval = 1.0 / tick_rate
+        self.start_map_id = start_map_id
+        self._maps = {} # map_id -> (stripped tiles, NPC positions, player spawn)
+        self._visible_maps = {} # map_id -> maps a player there can see
+        self.spawn = self.map_state(start_map_id)[2] or (5, 5) # Same fallback as find_player_spawn_on_map
+        self.selector = selectors.DefaultSelector()
+        self.listener = None
+        self.clients = {} # socket -> RemotePlayer
+        self.next_player_id = 1
+        self.positions = {} # Player states at the end of the last tick: id -> (map_id, x, y)
+        self.tick_count = 0
+        self.tick_times = [] # Seconds spent in each tick
+        self._stop = threading.Event()
+
+    def map_state(self, map_id):
+        """Returns (tiles, NPC positions, player spawn) for a map, prepared once."""
+        if map_id not in self._maps:
+            self._maps[map_id] = movement_map_state(self.maps_data[map_id])
+        return self._maps[map_id]
+
+    def visible_maps(self, map_id):
+        """Interest set for a player on map_id: the map itself plus its connected neighbours."""
+        if map_id not in self._visible_maps:
+            self._visible_maps[map_id] = frozenset([map_id] + [connection[3] for connection in MAP_CONNECTIONS.get(map_id, ())])
+        return self._visible_maps[map_id]
+
+    def start(self):
+        """Binds the listening socket and returns the actual port (useful with port=0)."""
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen()
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.port = self.listener.getsockname()[1]
+        return self.port
+
+    def serve_forever(self):
+        """Handles sockets between ticks and runs tick() every tick_interval until stop()."""
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            timeout = max(0.0, next_tick - time.perf_counter())
+            for key, _ in self.selector.select(timeout):
+                if key.fileobj is self.listener:
+                    self._accept()
+                else:
+                    self._read(self.clients.get(key.fileobj))
+            if time.perf_counter() >= next_tick:
+                tick_started = time.perf_counter()
+                self.tick()
+                self.tick_times.append(time.perf_counter() - tick_started)
+                next_tick += self.tick_interval
+        self._shutdown()
+
+    def stop(self):
+        """Asks serve_forever to return after the current iteration."""
+        self._stop.set()
+
+    def _shutdown(self):
+        for client in list(self.clients.values()):
+            self._disconnect(client)
+        if self.listener:
+            self.selector.unregister(self.listener)
+            self.listener.close()
+            self.listener = None
+        self.selector.close()
+
+    def _accept(self):
+        sock, _ = self.listener.accept()
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = RemotePlayer(self.next_player_id, sock, self.start_map_id, self.spawn[0], self.spawn[1])
+        self.next_player_id += 1
+        self.clients[sock] = client
+        self.selector.register(sock, selectors.EVENT_READ)
+        self._send(client, {"id": client.id, "t": self.tick_count})
+
+    def _disconnect(self, client):
+        if self.clients.get(client.sock) is not client:
+            return # Already disconnected
+        self.selector.unregister(client.sock)
+        client.sock.close()
+        del self.clients[client.sock]
+
+    def _read(self, client):
+        if client is None:
+            return
+        try:
+            data = client.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._disconnect(client) # Client closed the connection
+            return
+        *lines, client.inbuf = (client.inbuf + data).split(b"\n")
+        if len(client.inbuf) > SERVER_MAX_MESSAGE_BYTES or any(len(line) > SERVER_MAX_MESSAGE_BYTES for line in lines):
+            self._disconnect(client) # No real message is this long; stop reading from it
+            return
+        for line in lines:
+            try:
+                message = json.loads(line)
+            except RecursionError:
+                self._disconnect(client) # Deeply nested input is an attack, not a typo
+                return
+            except ValueError:
+                continue # Ignore malformed messages
+            if not isinstance(message, dict):
+                continue
+            move = message.get("move")
+            # type() rather than isinstance(): JSON true/false are bools, which would pass as 1/0
+            if isinstance(move, list) and len(move) == 2 and all(type(v) is int for v in move) and tuple(move) in DIRECTIONS:
+                client.pending_move = tuple(move)
+            elif "hello" in message:
+                client.name = str(message["hello"])[:MAX_PLAYER_NAME_LENGTH]
+
+    def _send(self, client, payload):
+        self._send_bytes(client, json.dumps(payload, separators=(",", ":")).encode() + b"\n")
+
+    def _send_bytes(self, client, data):
+        client.outbuf += data
+        self._flush(client)
+        if len(client.outbuf) > SERVER_MAX_BUFFER_BYTES:
+            self._disconnect(client) # Client stopped reading; don't let its backlog grow without bound
+
+    def _flush(self, client):
+        if not client.outbuf:
+            return
+        try:
+            sent = client.sock.send(client.outbuf)
+        except (BlockingIOError, InterruptedError):
+            return # Kernel buffer full; retry on the next tick
+        except OSError:
+            return # Reset connections are cleaned up by _read
+        client.bytes_sent += sent
+        client.outbuf = client.outbuf[sent:]
+
+    def tick(self):
+        """Applies at most one move per player, then sends each client its visible deltas."""
+        self.tick_count += 1
+        previous = self.positions
+        current = {}
+        players_by_map = {}
+        for client in self.clients.values():
+            if client.pending_move:
+                tiles, npcs, _ = self.map_state(client.map_id)
+                dx, dy = client.pending_move
+                _, client.map_id, client.x, client.y = resolve_move(self.maps_data, client.map_id, tiles, client.x, client.y, dx, dy, npcs)
+                client.pending_move = None
+            current[client.id] = (client.map_id, client.x, client.y)
+            players_by_map.setdefault(client.map_id, []).append(client.id)
+        # (id, previous state, current state); None marks a player who joined or left
+        changes = [(player_id, previous.get(player_id), state) for player_id, state in current.items() if previous.get(player_id) != state]
+        changes += [(player_id, state, None) for player_id, state in previous.items() if player_id not in current]
+        self.positions = current
+
+        shared_deltas = {} # interest set -> encoded delta for clients whose interest set is unchanged
+        for client in list(self.clients.values()):
+            self._flush(client) # Retry anything left over from the previous tick
+            interest = self.visible_maps(client.map_id)
+            if interest == client.interest:
+                if interest not in shared_deltas:
+                    shared_deltas[interest] = self._encode_delta(changes, interest, interest, players_by_map, current)
+                data = shared_deltas[interest]
+            else:
+                data = self._encode_delta(changes, client.interest, interest, players_by_map, current)
+            client.interest = interest
+            if data:
+                self._send_bytes(client, data)
+
+    def _encode_delta(self, changes, old_interest, new_interest, players_by_map, current):
+        """Encodes what a client that could see old_interest must learn to see new_interest."""
+        updates = {}
+        removed = set()
+        for player_id, before, after in changes:
+            if after and after[0] in new_interest:
+                updates[player_id] = after
+            elif before and before[0] in old_interest:
+                removed.add(player_id)
+        for map_id in new_interest - old_interest: # Newly visible maps: send everyone on them
+            for player_id in players_by_map.get(map_id, ()):
+                updates[player_id] = current[player_id]
+        for map_id in old_interest - new_interest: # Maps no longer visible: forget everyone on them
+            removed.update(player_id for player_id in players_by_map.get(map_id, ()) if player_id not in updates)
+        if not updates and not removed:
+            return None
+        payload = {"t": self.tick_count, "u": updates}
+        if removed:
+            payload["r"] = sorted(removed)
+        return json.dumps(payload, separators=(",", ":")).encode() + b"\n"
+
+def run_load_test(num_bots, duration=10.0, tick_rate=SERVER_TICK_RATE):
+    """Runs a WorldServer with num_bots headless random-walking clients and returns stats."""
+    server = WorldServer(load_maps_data()[0], port=0, tick_rate=tick_rate)
+    port = server.start()
+    server_thread = threading.Thread(target=server.serve_forever, name="world-server", daemon=True)
+    server_thread.start()
+
+    bot_selector = selectors.DefaultSelector()
+    bots = []
+    for bot_index in range(num_bots):
+        sock = socket.create_connection((SERVER_HOST, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(json.dumps({"hello": f"BOT{bot_index}"}).encode() + b"\n")
+        sock.setblocking(False)
+        bot_selector.register(sock, selectors.EVENT_READ)
+        bots.append(sock)
+
+    bytes_received = 0
+    started = time.perf_counter()
+    next_input = started
+    while time.perf_counter() - started < duration:
+        now = time.perf_counter()
+        if now >= next_input:
+            for sock in bots: # Every bot sends one random move per tick
+                try:
+                    sock.send(json.dumps({"move": random.choice(DIRECTIONS)}).encode() + b"\n")
+                except (BlockingIOError, InterruptedError):
+                    pass
+            next_input += 1.0 / tick_rate
+        for key, _ in bot_selector.select(max(0.0, next_input - time.perf_counter())):
+            try:
+                bytes_received += len(key.fileobj.recv(65536))
+            except (BlockingIOError, InterruptedError):
+                pass
+    elapsed = time.perf_counter() - started
+
+    server.stop()
+    server_thread.join()
+    for sock in bots:
+        bot_selector.unregister(sock)
+        sock.close()
+    bot_selector.close()
+
+    tick_times = sorted(server.tick_times) or [0.0]
+    return {
+        'bots': num_bots,
+        'seconds': elapsed,
+        'ticks': len(server.tick_times),
+        'tick_ms_mean': sum(tick_times) / len(tick_times) * 1000,
+        'tick_ms_p99': tick_times[min(len(tick_times) - 1, int(len(tick_times) * 0.99))] * 1000,
+        'tick_ms_max': tick_times[-1] * 1000,
+        'bytes_per_client_per_second': bytes_received / max(1, num_bots) / elapsed,
+    }
+
+def load_test_main(args):
+    """Command-line entry point: --load-test N [seconds]."""
+    num_bots = int(args[0]) if args else 10
+    duration = float(args[1]) if len(args) > 1 else 10.0
+    stats = run_load_test(num_bots, duration)
+    print(f"{stats['bots']} bots, {stats['ticks']} ticks in {stats['seconds']:.1f} s")
+    print(f"Server tick: mean {stats['tick_ms_mean']:.3f} ms, p99 {stats['tick_ms_p99']:.3f} ms, max {stats['tick_ms_max']:.3f} ms")
+    print(f"Downstream: {stats['bytes_per_client_per_second']:.1f} bytes per client per second")
+    return 0
+
+def server_main():
+    """Command-line entry point: runs the world server until interrupted."""
+    server = WorldServer(load_maps_data()[0])
+    port = server.start()
+    print(f"World server listening on {SERVER_HOST}:{port} at {SERVER_TICK_RATE} ticks per second.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server._shutdown()
+    return 0
+
+# --- Scenes (Each game state handles its own input, update and draw) ---
+class Scene:
+    """Base class for entries on the game's scene stack.
+
+    Anything that never changes is drawn once into a cached static layer and blitted
+    each frame. Only the top scene receives input and updates; scenes below an opaque
+    scene are not drawn at all.
+    """
+    is_overlay = False # Overlays are drawn on top of the scene below them
+    shows_mouse_cursor = False # Draw the custom mouse cursor while this is the base scene
+
+    def __init__(self, game):
+        self.game = game
+        self._static_layer = None # Built lazily on first draw (needs an initialised display)
+
+    def build_static_layer(self, surface):
+        """Draws the parts of the scene that never change. Override in subclasses."""
+        pass
+
+    def static_layer(self):
+        """Returns the cached static layer, rendering it on first use."""
+        if self._static_layer is None:
+            self._static_layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            self._static_layer.fill(BLACK)
+            self.build_static_layer(self._static_layer)
+        return self._static_layer
+
+    def handle_event(self, event):
+        """Handles a single input event while this scene is on top."""
+        pass
+
+    def update(self):
+        """Updates scene logic once per frame while this scene is on top."""
+        pass
+
+    def draw(self, surface):
+        """Draws the scene; by default just the cached static layer."""
+        surface.blit(self.static_layer(), (0, 0))
+
+class IntroScene(Scene):
+    """Welcome, professor speech and farewell screens: the professor on a black background."""
+    def build_static_layer(self, surface):
+        prof_rect = self.game.prof_rect
+        # Draw Professor visual (simple representation)
+        pygame.draw.rect(surface, C_PROF, prof_rect, border_radius=10)
+        pygame.draw.rect(surface, BLACK, prof_rect, 2, border_radius=10)
+        eye_y = prof_rect.centery - TILE_SIZE // 3 # Position eyes
+        pygame.draw.circle(surface, WHITE, (prof_rect.centerx - TILE_SIZE//4, eye_y), TILE_SIZE//8)
+        pygame.draw.circle(surface, WHITE, (prof_rect.centerx + TILE_SIZE//4, eye_y), TILE_SIZE//8)
+        pygame.draw.circle(surface, BLACK, (prof_rect.centerx - TILE_SIZE//4, eye_y), TILE_SIZE//16) # Pupils
+        pygame.draw.circle(surface, BLACK, (prof_rect.centerx + TILE_SIZE//4, eye_y), TILE_SIZE//16)
+        pygame.draw.line(surface, BLACK, (prof_rect.centerx - TILE_SIZE//5, prof_rect.centery + TILE_SIZE//5),
+                                         (prof_rect.centerx + TILE_SIZE//5, prof_rect.centery + TILE_SIZE//5), 2) # Mouth
+
+class GenderSelectScene(Scene):
+    """Boy/girl selection with two clickable buttons."""
+    shows_mouse_cursor = True
+
+    def __init__(self, game):
+        super().__init__(game)
+        self._button_surfaces = {} # (label, hovered) -> pre-rendered button surface
+
+    def build_static_layer(self, surface):
+        prompt_surf = self.game.ui_font.render("Are you a BOY or a GIRL?", True, WHITE)
+        prompt_rect = prompt_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 100))
+        surface.blit(prompt_surf, prompt_rect)
+
+    def button_surface(self, label, rect, hovered):
+        """Returns a cached rendering of a button in its normal or hover state."""
+        key = (label, hovered)
+        if key not in self._button_surfaces:
+            button_surf = pygame.Surface(rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(button_surf, C_BUTTON_HOVER if hovered else C_BUTTON, button_surf.get_rect(), border_radius=10)
+            text_surf = self.game.ui_font.render(label, True, C_BUTTON_TEXT)
+            button_surf.blit(text_surf, text_surf.get_rect(center=button_surf.get_rect().center))
+            self._button_surfaces[key] = button_surf
+        return self._button_surfaces[key]
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1: # Left click
+            mouse_pos = pygame.mouse.get_pos()
+            if self.game.boy_button_rect.collidepoint(mouse_pos):
+                self.game.player_gender = "boy"
+                self.game.transition_to_name_input()
+            elif self.game.girl_button_rect.collidepoint(mouse_pos):
+                self.game.player_gender = "girl"
+                self.game.transition_to_name_input()
+
+    def draw(self, surface):
+        super().draw(surface)
+        mouse_pos = pygame.mouse.get_pos() # Get mouse pos for hover effect
+        for label, rect in (("BOY", self.game.boy_button_rect), ("GIRL", self.game.girl_button_rect)):
+            surface.blit(self.button_surface(label, rect, rect.collidepoint(mouse_pos)), rect)
+
+class NameInputScene(Scene):
+    """Player name entry field with a blinking cursor."""
+    shows_mouse_cursor = True
+
+    def build_static_layer(self, surface):
+        name_input_rect = self.game.name_input_rect
+        pygame.draw.rect(surface, C_TEXT_INPUT_BG, name_input_rect, border_radius=5)
+        pygame.draw.rect(surface, C_TEXT_INPUT_BORDER, name_input_rect, 2, border_radius=5)
+        self._hint_surf = self.game.dialogue_box.alt_font.render(f"Max {MAX_PLAYER_NAME_LENGTH} chars. Press Enter to confirm.", True, (180,180,180))
+        self._hint_rect = self._hint_surf.get_rect(center=(SCREEN_WIDTH // 2, name_input_rect.bottom + 30))
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN and len(self.game.player_name_input) > 0:
+                self.game.finalize_intro_and_start_game()
+            elif event.key == pygame.K_BACKSPACE:
+                self.game.player_name_input = self.game.player_name_input[:-1]
+            elif len(self.game.player_name_input) < MAX_PLAYER_NAME_LENGTH:
+                if event.unicode.isalnum(): # Allow alphanumeric characters
+                    self.game.player_name_input += event.unicode.upper() # Uppercase for Pokémon names
+
+    def draw(self, surface):
+        super().draw(surface)
+        dialogue_active = self.game.dialogue_box.active
+        # Display typed name with a blinking cursor effect
+        cursor_visible = int(time.time() * 2) % 2 == 0 # Blink underscore cursor
+        name_display_text = self.game.player_name_input
+        if cursor_visible and len(name_display_text) < MAX_PLAYER_NAME_LENGTH and not dialogue_active:
+            name_display_text += "_"
+
+        name_surf = self.game.name_input_font.render(name_display_text, True, WHITE)
+        name_rect = name_surf.get_rect(midleft=(self.game.name_input_rect.left + 15, self.game.name_input_rect.centery))
+        surface.blit(name_surf, name_rect)
+
+        if not dialogue_active: # Show hint only when dialogue is not active
+            surface.blit(self._hint_surf, self._hint_rect)
+
+class GameplayScene(Scene):
+    """Main exploration mode: map tiles, NPCs and the player."""
+    def handle_event(self, event):
+        game = self.game
+        if game.player and event.type == pygame.KEYDOWN:
+            action_result = ""
+            if event.key == pygame.K_LEFT: action_result = game.player.move(-1, 0)
+            elif event.key == pygame.K_RIGHT: action_result = game.player.move(1, 0)
+            elif event.key == pygame.K_UP: action_result = game.player.move(0, -1)
+            elif event.key == pygame.K_DOWN: action_result = game.player.move(0, 1)
+            if action_result:
+                game.telemetry.log("player_action", result=action_result, x=game.player.x, y=game.player.y, map=game.current_map_id)
+
+    def update(self):
+        game = self.game
+        if game.player:
+            # Camera follows player, clamped to the bounds of the connected maps (neighbours are drawn in the margins)
+            game.camera_x, game.camera_y = camera_position(game.map_layout, game.current_map_id, game.player.x, game.player.y)
+            game.prefetch_neighbor_maps()
+
+    def draw(self, surface):
+        game = self.game
+        surface.fill(C_GRASS_REGULAR) # Default background for game area
+        surface.set_clip(pygame.Rect(0, 0, SCREEN_WIDTH, GAME_AREA_HEIGHT)) # Keep the map out of the dialogue area
+        game_area = surface.get_clip()
+
+        # Draw connected neighbours in the margins (pre-rendered in the background)
+        for connection in MAP_CONNECTIONS.get(game.current_map_id, ()):
+            if connection[3] not in game.maps_data:
+                continue
+            origin_x, origin_y = neighbor_origin(game.maps_data, game.current_map_id, connection)
+            neighbor_info = game.maps_data[connection[3]]
+            screen_rect = pygame.Rect(origin_x * TILE_SIZE - game.camera_x, origin_y * TILE_SIZE - game.camera_y,
+                                      neighbor_info['width'] * TILE_SIZE, neighbor_info['height'] * TILE_SIZE)
+            if not screen_rect.colliderect(game_area):
+                continue
+            neighbor_future = game.request_map(connection[3])
+            if not neighbor_future.done():
+                surface.fill(C_MAP_PLACEHOLDER, screen_rect) # Prefetch lagged; never wait for it on the render thread
+                continue
+            neighbor = neighbor_future.result()
+            neighbor.draw(surface, screen_rect.x, screen_rect.y, game_area)
+            for c, r in neighbor.npc_spawns:
+                draw_entity_shape(surface, screen_rect.x + c * TILE_SIZE, screen_rect.y + r * TILE_SIZE, C_NPC)
+
+        # Draw the current map's pre-rendered chunks that are in view
+        game.prepared_map(game.current_map_id).draw(surface, -game.camera_x, -game.camera_y, game_area)
+
+        # Draw NPCs
+        for npc in game.npcs:
+            npc.draw(surface, game.camera_x, game.camera_y)
+        # Draw Player
+        if game.player:
+            game.player.draw(surface, game.camera_x, game.camera_y)
+        surface.set_clip(None)
+
+class DialogueOverlayScene(Scene):
+    """Dialogue box drawn over the scene below; pushed while a message is showing."""
+    is_overlay = True
+
+    def handle_event(self, event):
+        self.game.dialogue_box.handle_input(event)
+
+    def draw(self, surface):
+        self.game.dialogue_box.draw()
 
 class GameMock:
     """Main class for the game engine, managing states, game loop, and rendering."""
-    def __init__(self):
+    def __init__(self, dev_mode=False):
         pygame.init()
         pygame.mouse.set_visible(False) # Hide default system mouse cursor
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Pokémon Style RPG Engine")
         self.clock = pygame.time.Clock() # Pygame clock for controlling FPS
+        self.telemetry = TelemetryLogger(TELEMETRY_LOG_PATH) # Gameplay event log, flushed on a background thread
+        self.telemetry.start()
         
         # Fonts for different UI elements
         self.dialogue_font = pygame.font.Font(None, 32)
@@ -455,11 +1671,17 @@ class GameMock:
         self.prof_rect = pygame.Rect(SCREEN_WIDTH // 2 - TILE_SIZE * 1.5, SCREEN_HEIGHT // 2 - TILE_SIZE * 3, TILE_SIZE * 3, TILE_SIZE * 3)
 
         # Store all map data
-        self.maps_data = {
-            MAP_LITTLEROOT: {'data': littleroot_town_map_data, 'width': len(littleroot_town_map_data[0]), 'height': len(littleroot_town_map_data)},
-            MAP_ROUTE_101: {'data': route_101_map_data, 'width': len(route_101_map_data[0]), 'height': len(route_101_map_data)},
-            MAP_OLDALE: {'data': oldale_town_map_data, 'width': len(oldale_town_map_data[0]), 'height': len(oldale_town_map_data)},
-        }
+        self.maps_data = build_maps_data()
+        # Prepared (stripped and pre-rendered) maps, built on a background thread and keyed by map ID
+        self.map_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="map-prefetch")
+        self.prepared_maps = {} # map_id -> Future resolving to a PreparedMap
+        # Development mode: maps come from MAP_DIR files and are hot-reloaded when they change
+        self.map_watcher = None
+        if dev_mode:
+            load_map_files(self.maps_data)
+            self.map_watcher = MapWatcher(self.maps_data)
+            self.map_watcher.start()
+        self.map_layout = map_world_layout(self.maps_data) # Shared tile grid of connected maps, for the camera
         # Current map properties (will be updated when map changes)
         self.current_map_id = MAP_LITTLEROOT
         self.current_map_data = self.maps_data[self.current_map_id]['data']
@@ -480,17 +1702,53 @@ class GameMock:
         self.name_input_rect = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2, 300, 50)
         
         self.camera_x, self.camera_y = 0,0 # Camera position for scrolling map
+
+        # Scene table: each game state maps to the scene that handles it (intro screens share one scene)
+        intro_scene = IntroScene(self)
+        self.scenes = {
+            STATE_INTRO_WELCOME: intro_scene,
+            STATE_INTRO_PROF_SPEECH: intro_scene,
+            STATE_TRANSITION_TO_GAME: intro_scene,
+            STATE_INTRO_GENDER_SELECT: GenderSelectScene(self),
+            STATE_INTRO_NAME_INPUT: NameInputScene(self),
+            STATE_GAMEPLAY: GameplayScene(self),
+        }
+        self.dialogue_overlay = DialogueOverlayScene(self)
+        self.scene_stack = [self.scenes[self.game_state]] # Base scene at index 0, overlays above it
         
         self.start_intro() # Begin the game with the intro sequence
 
+    def set_state(self, state):
+        """Switches the game state, replacing the base scene via the scene table."""
+        self.game_state = state
+        self.scene_stack[0] = self.scenes[state]
+
+    def push_scene(self, scene):
+        """Pushes a scene on top of the stack; it receives input until popped."""
+        self.scene_stack.append(scene)
+
+    def pop_scene(self):
+        """Removes and returns the top scene (the base scene is never popped)."""
+        if len(self.scene_stack) > 1:
+            return self.scene_stack.pop()
+        return None
+
+    def sync_dialogue_overlay(self):
+        """Keeps the dialogue overlay on top of the stack exactly while a message is showing."""
+        overlay_on_top = self.scene_stack[-1] is self.dialogue_overlay
+        if self.dialogue_box.active and not overlay_on_top:
+            self.push_scene(self.dialogue_overlay)
+        elif not self.dialogue_box.active and overlay_on_top:
+            self.pop_scene()
+
     def start_intro(self):
         """Initiates the introductory sequence of the game."""
-        self.game_state = STATE_INTRO_WELCOME
+        self.set_state(STATE_INTRO_WELCOME)
         self.dialogue_box.show_message(f"Welcome to the world of Pokémon!", self.start_prof_speech)
 
     def start_prof_speech(self):
         """Starts the professor's speech part of the intro."""
-        self.game_state = STATE_INTRO_PROF_SPEECH
+        self.set_state(STATE_INTRO_PROF_SPEECH)
         self.prof_speech_stage = 0
         self.advance_prof_speech()
 
@@ -511,24 +1769,24 @@ class GameMock:
 
     def transition_to_gender_select(self):
         """Transitions the game state to gender selection."""
-        self.game_state = STATE_INTRO_GENDER_SELECT
+        self.set_state(STATE_INTRO_GENDER_SELECT)
         self.dialogue_box.active = False # Hide dialogue box to show UI elements
 
     def transition_to_name_input(self):
         """Transitions the game state to name input after gender is selected."""
-        self.game_state = STATE_INTRO_NAME_INPUT
+        self.set_state(STATE_INTRO_NAME_INPUT)
         self.dialogue_box.show_message(f"{self.prof_name}: I see! So, you're a {self.player_gender}. And what is your name?", None)
 
     def finalize_intro_and_start_game(self):
         """Finalizes intro, creates player object, and prepares to start gameplay."""
-        self.game_state = STATE_TRANSITION_TO_GAME
+        self.set_state(STATE_TRANSITION_TO_GAME)
         spawn_x, spawn_y = self.find_player_spawn_on_map(MAP_LITTLEROOT)
         self.player = Player(spawn_x, spawn_y, self, name=self.player_name_input, gender=self.player_gender)
         self.dialogue_box.show_message(f"{self.prof_name}: {self.player.name}, your very own Pokémon legend is about to unfold! A world of dreams and adventures with Pokémon awaits! Let's go!", self.actually_start_gameplay)
 
     def actually_start_gameplay(self):
         """Transitions to the main gameplay state and loads the starting map."""
-        self.game_state = STATE_GAMEPLAY
+        self.set_state(STATE_GAMEPLAY)
         self.current_map_id = MAP_LITTLEROOT # Set the initial map for gameplay
         self.load_map(self.current_map_id, initial_load=True)
 
@@ -542,6 +1800,38 @@ class GameMock:
         print(f"Warning: Player spawn (PSP) not found on map {map_id}. Defaulting.")
         return 5, 5 # Fallback spawn position
 
+    def request_map(self, map_id, warm_rect=None):
+        """Starts preparing a map in the background (if not already) and returns its future.
+
+        warm_rect is an optional tile rectangle of the map whose chunks are pre-rendered too.
+        """
+        if map_id not in self.prepared_maps:
+            self.prepared_maps[map_id] = self.map_loader.submit(PreparedMap, map_id, self.maps_data[map_id], warm_rect)
+        return self.prepared_maps[map_id]
+
+    def prepared_map(self, map_id):
+        """Returns the PreparedMap for map_id, waiting for the background loader if needed."""
+        return self.request_map(map_id).result()
+
+    def prefetch_neighbor_maps(self):
+        """Requests neighbouring maps once the player is within NEIGHBOR_PREFETCH_DISTANCE of a connected edge."""
+        for connection in MAP_CONNECTIONS.get(self.current_map_id, ()):
+            edge, target_map_id = connection[0], connection[3]
+            if target_map_id in self.prepared_maps or target_map_id not in self.maps_data:
+                continue
+            if edge == "north": distance = self.player.y
+            elif edge == "south": distance = self.current_map_height_tiles - 1 - self.player.y
+            elif edge == "west": distance = self.player.x
+            else: distance = self.current_map_width_tiles - 1 - self.player.x
+            if distance <= NEIGHBOR_PREFETCH_DISTANCE:
+                # Pre-render the part of the neighbour that can come into view before the player reaches it
+                origin_x, origin_y = neighbor_origin(self.maps_data, self.current_map_id, connection)
+                reach_x = NEIGHBOR_PREFETCH_DISTANCE + VIEWPORT_WIDTH_TILES // 2 + 1
+                reach_y = NEIGHBOR_PREFETCH_DISTANCE + VIEWPORT_HEIGHT_TILES // 2 + 1
+                warm_rect = pygame.Rect(self.player.x - origin_x - reach_x, self.player.y - origin_y - reach_y,
+                                        reach_x * 2 + 1, reach_y * 2 + 1)
+                self.request_map(target_map_id, warm_rect)
+
     def load_map(self, map_id, initial_load=False):
         """Loads map data, NPCs, and replaces spawn markers."""
         if map_id not in self.maps_data:
@@ -549,38 +1839,86 @@ class GameMock:
             return
 
         self.current_map_id = map_id
-        map_info = self.maps_data[map_id]
-        self.current_map_data = [row[:] for row in map_info['data']] # Deep copy for mutable map
-        self.current_map_width_tiles = map_info['width']
-        self.current_map_height_tiles = map_info['height']
+        prepared = self.prepared_map(map_id) # Usually prefetched already, so no parsing or rendering here
+        self.current_map_data = [row[:] for row in prepared.tiles] # Deep copy for mutable map
+        self.current_map_width_tiles = prepared.width
+        self.current_map_height_tiles = prepared.height
+
+        # Only keep the current map and its direct neighbours prepared
+        keep = {map_id} | {connection[3] for connection in MAP_CONNECTIONS.get(map_id, ())}
+        for cached_map_id in [cached for cached in self.prepared_maps if cached not in keep]:
+            del self.prepared_maps[cached_map_id]
         
         self.npcs = [] # Clear NPCs from previous map
         
-        for r, row in enumerate(self.current_map_data):
-            for c, tile in enumerate(row):
-                if tile == T_PLAYER_SPAWN:
-                    # Replace spawn marker with a walkable tile (e.g., path)
-                    # This is important so the tile is walkable if player re-enters map at this point
-                    # The actual player object creation/positioning is handled by intro or change_map
-                    self.current_map_data[r][c] = T_PATH_GRASS 
-                elif tile == T_NPC_SPAWN:
-                    # Define NPCs based on map and location
-                    npc_name = "Youngster" # Default NPC
-                    npc_dialogue = "I like shorts! They're comfy and easy to wear!"
-                    if map_id == MAP_LITTLEROOT and c == 12 and r == 3: # Prof Birch in Lab
-                        npc_name = self.prof_name
-                        npc_dialogue = "Ah, [PlayerName]! How is your Pokémon journey coming along?"
-                    elif map_id == MAP_LITTLEROOT and c == 3 and r == 12: # Mom in Player's House
-                        npc_name = "Mom"
-                        npc_dialogue = "Be careful out there, [PlayerName]! And don't forget to change your underwear!"
-                    
-                    self.npcs.append(NPC(c, r, self, name=npc_name, dialogue=npc_dialogue))
-                    self.current_map_data[r][c] = T_PATH_GRASS # Replace NPC spawn marker
+        for c, r in prepared.npc_spawns:
+            # Define NPCs based on map and location
+            npc_name = "Youngster" # Default NPC
+            npc_dialogue = "I like shorts! They're comfy and easy to wear!"
+            if map_id == MAP_LITTLEROOT and c == 12 and r == 3: # Prof Birch in Lab
+                npc_name = self.prof_name
+                npc_dialogue = "Ah, [PlayerName]! How is your Pokémon journey coming along?"
+            elif map_id == MAP_LITTLEROOT and c == 3 and r == 12: # Mom in Player's House
+                npc_name = "Mom"
+                npc_dialogue = "Be careful out there, [PlayerName]! And don't forget to change your underwear!"
+            
+            self.npcs.append(NPC(c, r, self, name=npc_name, dialogue=npc_dialogue))
+
+    def reload_map(self, map_id):
+        """Reloads one map from its file, rebuilding only the data derived from that map.
+
+        Other maps' prepared data is untouched, only the changed chunks of this map are
+        redrawn, and the player's position and the game state are kept.
+        """
+        started = time.perf_counter()
+        path = map_file_path(map_id)
+        try:
+            with open(path, encoding="utf-8") as map_file:
+                map_info = make_map_info(parse_map_file(map_file.read()))
+        except (OSError, ValueError) as error:
+            self.telemetry.log("map_reload_failed", map=map_id, path=path, error=str(error)) # No printing in the frame loop
+            return
+        self.maps_data[map_id] = map_info
+        self.map_layout = map_world_layout(self.maps_data) # The map's size may have changed
+
+        # Prepared data is updated only if this map was cached: in place when ready, so only
+        # the chunks containing changed tiles are redrawn and nothing waits for the loader
+        future = self.prepared_maps.get(map_id)
+        redrawn_chunks = 0
+        if future is not None and future.done():
+            redrawn_chunks = future.result().update(map_info)
+        elif future is not None: # Still being prepared from the old data
+            future.cancel()
+            del self.prepared_maps[map_id]
+            self.request_map(map_id)
+
+        if map_id == self.current_map_id and self.game_state == STATE_GAMEPLAY:
+            self.load_map(map_id) # Refreshes tiles, dimensions and NPCs for the current map
+            if self.player: # Keep the player where they were, inside the (possibly resized) map
+                self.player.y = max(0, min(self.player.y, self.current_map_height_tiles - 1))
+                self.player.x = max(0, min(self.player.x, len(self.current_map_data[self.player.y]) - 1))
+                # An edit may have put a solid tile or an NPC under the player; step them out of it
+                npc_positions = {(npc.x, npc.y) for npc in self.npcs}
+                safe_tile = nearest_walkable_tile(self.current_map_data, self.player.x, self.player.y, npc_positions)
+                if safe_tile is None:
+                    self.telemetry.log("player_relocation_failed", map=map_id, x=self.player.x, y=self.player.y)
+                elif safe_tile != (self.player.x, self.player.y):
+                    self.telemetry.log("player_relocated", map=map_id, x=self.player.x, y=self.player.y,
+                                       new_x=safe_tile[0], new_y=safe_tile[1])
+                    self.player.x, self.player.y = safe_tile
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.telemetry.log("map_reloaded", map=map_id, chunks=redrawn_chunks, ms=round(elapsed_ms, 3))
 
     def change_map(self, new_map_id, player_new_x, player_new_y):
         """Handles changing maps and repositioning the player."""
-        print(f"Changing map from {self.current_map_id} to {new_map_id}. Player to ({player_new_x}, {player_new_y})")
-        
+        self.telemetry.log("map_changed", source=self.current_map_id, target=new_map_id, x=player_new_x, y=player_new_y)
+
+        # Carry the camera over into the new map's coordinates so the view does not jump
+        origins = self.map_layout[0]
+        if self.current_map_id in origins and new_map_id in origins:
+            self.camera_x += (origins[self.current_map_id][1] - origins[new_map_id][1]) * TILE_SIZE
+            self.camera_y += (origins[self.current_map_id][2] - origins[new_map_id][2]) * TILE_SIZE
+
         # Update player's position for the new map
         self.player.x = player_new_x
         self.player.y = player_new_y
@@ -588,58 +1926,22 @@ class GameMock:
         self.load_map(new_map_id) # Load new map data and NPCs
 
     def handle_input(self):
-        """Processes all user input based on the current game state."""
-        mouse_pos = pygame.mouse.get_pos() # Get current mouse position
-
+        """Processes all user input, dispatching each event to the top scene."""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False # Signal to quit the game loop
-
-            # Dialogue input handling takes precedence if active
-            if self.dialogue_box.active:
-                if self.dialogue_box.handle_input(event):
-                    continue # Dialogue handled input, skip other state-specific input
-
-            # State-specific input handling
-            if self.game_state == STATE_INTRO_GENDER_SELECT:
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1: # Left click
-                    if self.boy_button_rect.collidepoint(mouse_pos):
-                        self.player_gender = "boy"
-                        self.transition_to_name_input()
-                    elif self.girl_button_rect.collidepoint(mouse_pos):
-                        self.player_gender = "girl"
-                        self.transition_to_name_input()
-            elif self.game_state == STATE_INTRO_NAME_INPUT:
-                if not self.dialogue_box.active: # Allow name input only after prof asks
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_RETURN and len(self.player_name_input) > 0:
-                            self.finalize_intro_and_start_game()
-                        elif event.key == pygame.K_BACKSPACE:
-                            self.player_name_input = self.player_name_input[:-1]
-                        elif len(self.player_name_input) < MAX_PLAYER_NAME_LENGTH:
-                            if event.unicode.isalnum(): # Allow alphanumeric characters
-                                self.player_name_input += event.unicode.upper() # Uppercase for Pokémon names
-            
-            elif self.game_state == STATE_GAMEPLAY:
-                if self.player and not self.dialogue_box.active and event.type == pygame.KEYDOWN:
-                    action_result = ""
-                    if event.key == pygame.K_LEFT: action_result = self.player.move(-1, 0)
-                    elif event.key == pygame.K_RIGHT: action_result = self.player.move(1, 0)
-                    elif event.key == pygame.K_UP: action_result = self.player.move(0, -1)
-                    elif event.key == pygame.K_DOWN: action_result = self.player.move(0, 1)
-                    if action_result: 
-                        print(f"Player action: {action_result}, New Pos: ({self.player.x}, {self.player.y}) on {self.current_map_id}")
+            # Dialogue may have opened or closed while handling the previous event
+            self.sync_dialogue_overlay()
+            self.scene_stack[-1].handle_event(event)
         return True # Signal to continue running
 
     def update(self):
-        """Updates game logic, like camera movement."""
-        if self.game_state == STATE_GAMEPLAY and self.player:
-            # Camera follows player
-            self.camera_x = self.player.x * TILE_SIZE - SCREEN_WIDTH // 2 + TILE_SIZE // 2
-            self.camera_y = self.player.y * TILE_SIZE - GAME_AREA_HEIGHT // 2 + TILE_SIZE // 2
-            # Clamp camera to map boundaries to prevent showing areas outside the map
-            self.camera_x = max(0, min(self.camera_x, self.current_map_width_tiles * TILE_SIZE - SCREEN_WIDTH))
-            self.camera_y = max(0, min(self.camera_y, self.current_map_height_tiles * TILE_SIZE - GAME_AREA_HEIGHT))
+        """Updates game logic for the top scene only; suspended scenes cost nothing."""
+        if self.map_watcher:
+            while self.map_watcher.changed:
+                self.reload_map(self.map_watcher.changed.popleft())
+        self.sync_dialogue_overlay()
+        self.scene_stack[-1].update()
 
     def draw_mouse_cursor(self):
         """Draws a custom mouse cursor."""
@@ -654,109 +1956,15 @@ class GameMock:
         pygame.draw.polygon(self.screen, BLACK, cursor_points, 1) # Border for cursor
 
     def draw(self):
-        """Handles all drawing operations based on the current game state."""
-        self.screen.fill(BLACK) # Default background for intro/transition states
-
-        # --- Drawing logic for INTRO states ---
-        if self.game_state in [STATE_INTRO_WELCOME, STATE_INTRO_PROF_SPEECH, STATE_TRANSITION_TO_GAME]:
-            # Draw Professor visual (simple representation)
-            pygame.draw.rect(self.screen, C_PROF, self.prof_rect, border_radius=10)
-            pygame.draw.rect(self.screen, BLACK, self.prof_rect, 2, border_radius=10) 
-            eye_y = self.prof_rect.centery - TILE_SIZE // 3 # Position eyes
-            pygame.draw.circle(self.screen, WHITE, (self.prof_rect.centerx - TILE_SIZE//4, eye_y), TILE_SIZE//8)
-            pygame.draw.circle(self.screen, WHITE, (self.prof_rect.centerx + TILE_SIZE//4, eye_y), TILE_SIZE//8)
-            pygame.draw.circle(self.screen, BLACK, (self.prof_rect.centerx - TILE_SIZE//4, eye_y), TILE_SIZE//16) # Pupils
-            pygame.draw.circle(self.screen, BLACK, (self.prof_rect.centerx + TILE_SIZE//4, eye_y), TILE_SIZE//16)
-            pygame.draw.line(self.screen, BLACK, (self.prof_rect.centerx - TILE_SIZE//5, self.prof_rect.centery + TILE_SIZE//5), 
-                                                (self.prof_rect.centerx + TILE_SIZE//5, self.prof_rect.centery + TILE_SIZE//5), 2) # Mouth
-
-        elif self.game_state == STATE_INTRO_GENDER_SELECT:
-            prompt_surf = self.ui_font.render("Are you a BOY or a GIRL?", True, WHITE)
-            prompt_rect = prompt_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 100))
-            self.screen.blit(prompt_surf, prompt_rect)
-
-            mouse_pos = pygame.mouse.get_pos() # Get mouse pos for hover effect
-            # Boy Button
-            boy_hover = self.boy_button_rect.collidepoint(mouse_pos)
-            pygame.draw.rect(self.screen, C_BUTTON_HOVER if boy_hover else C_BUTTON, self.boy_button_rect, border_radius=10)
-            boy_text_surf = self.ui_font.render("BOY", True, C_BUTTON_TEXT)
-            boy_text_rect = boy_text_surf.get_rect(center=self.boy_button_rect.center)
-            self.screen.blit(boy_text_surf, boy_text_rect)
-            # Girl Button
-            girl_hover = self.girl_button_rect.collidepoint(mouse_pos)
-            pygame.draw.rect(self.screen, C_BUTTON_HOVER if girl_hover else C_BUTTON, self.girl_button_rect, border_radius=10)
-            girl_text_surf = self.ui_font.render("GIRL", True, C_BUTTON_TEXT)
-            girl_text_rect = girl_text_surf.get_rect(center=self.girl_button_rect.center)
-            self.screen.blit(girl_text_surf, girl_text_rect)
-        
-        elif self.game_state == STATE_INTRO_NAME_INPUT:
-            pygame.draw.rect(self.screen, C_TEXT_INPUT_BG, self.name_input_rect, border_radius=5)
-            pygame.draw.rect(self.screen, C_TEXT_INPUT_BORDER, self.name_input_rect, 2, border_radius=5)
-            
-            # Display typed name with a blinking cursor effect
-            cursor_visible = int(time.time() * 2) % 2 == 0 # Blink underscore cursor
-            name_display_text = self.player_name_input
-            if cursor_visible and len(self.player_name_input) < MAX_PLAYER_NAME_LENGTH and not self.dialogue_box.active:
-                name_display_text += "_"
-            
-            name_surf = self.name_input_font.render(name_display_text, True, WHITE)
-            name_rect = name_surf.get_rect(midleft=(self.name_input_rect.left + 15, self.name_input_rect.centery))
-            self.screen.blit(name_surf, name_rect)
-
-            if not self.dialogue_box.active: # Show hint only when dialogue is not active
-                hint_surf = self.dialogue_box.alt_font.render(f"Max {MAX_PLAYER_NAME_LENGTH} chars. Press Enter to confirm.", True, (180,180,180))
-                hint_rect = hint_surf.get_rect(center=(SCREEN_WIDTH // 2, self.name_input_rect.bottom + 30))
-                self.screen.blit(hint_surf, hint_rect)
-
-        # --- Drawing logic for GAMEPLAY state ---
-        elif self.game_state == STATE_GAMEPLAY:
-            self.screen.fill(C_GRASS_REGULAR) # Default background for game area
-            # Draw Tiles (visible portion of the map)
-            for r_idx, row_val in enumerate(self.current_map_data):
-                for c_idx, tile_val in enumerate(row_val):
-                    tile_screen_x = c_idx * TILE_SIZE - self.camera_x
-                    tile_screen_y = r_idx * TILE_SIZE - self.camera_y
-                    # Cull tiles not on screen for efficiency
-                    if tile_screen_x + TILE_SIZE < 0 or tile_screen_x > SCREEN_WIDTH or \
-                       tile_screen_y + TILE_SIZE < 0 or tile_screen_y > GAME_AREA_HEIGHT:
-                        continue
-                    
-                    # Determine color based on tile type
-                    color = BLACK # Default for unknown/undefined tiles
-                    if tile_val == T_PATH_GRASS: color = C_PATH_GRASS
-                    elif tile_val == T_GRASS_REGULAR: color = C_GRASS_REGULAR
-                    elif tile_val == T_TALL_GRASS: color = C_TALL_GRASS
-                    elif tile_val == T_TREE: color = C_TREE_LEAVES
-                    elif tile_val == T_WATER: color = C_WATER
-                    elif tile_val == T_FLOWER_RED: color = C_FLOWER_RED
-                    elif tile_val == T_FLOWER_YELLOW: color = C_FLOWER_YELLOW
-                    elif tile_val == T_FENCE: color = C_FENCE
-                    elif tile_val == T_LEDGE_JUMP_DOWN: color = C_LEDGE
-                    elif tile_val in [T_PLAYER_HOUSE_WALL, T_RIVAL_HOUSE_WALL, T_LAB_WALL, T_PC_WALL, T_MART_WALL, T_BUILDING_WALL]:
-                        color = C_BUILDING_WALL_LIGHT # Generic wall
-                        if tile_val == T_PC_WALL: color = C_PC_WALL
-                        if tile_val == T_MART_WALL: color = C_MART_WALL
-                    elif tile_val in [T_PLAYER_HOUSE_DOOR, T_RIVAL_HOUSE_DOOR, T_LAB_DOOR, T_PC_DOOR, T_MART_DOOR]: color = C_DOOR
-                    elif tile_val in [T_ROOF_PLAYER, T_ROOF_RIVAL, T_ROOF_LAB, T_ROOF_PC, T_ROOF_MART]:
-                        color = C_ROOF_GRAY # Generic roof
-                        if tile_val == T_ROOF_PLAYER or tile_val == T_ROOF_RIVAL : color = C_ROOF_RED
-                        if tile_val == T_ROOF_PC: color = C_ROOF_GRAY # Specific roof for PC
-                        if tile_val == T_ROOF_MART: color = C_ROOF_MART # Specific roof for Mart
-                    elif tile_val == T_SIGN: color = C_SIGN
-                    pygame.draw.rect(self.screen, color, (tile_screen_x, tile_screen_y, TILE_SIZE, TILE_SIZE))
-            
-            # Draw NPCs
-            for npc in self.npcs:
-                npc.draw(self.screen, self.camera_x, self.camera_y)
-            # Draw Player
-            if self.player:
-                self.player.draw(self.screen, self.camera_x, self.camera_y)
-
-        # Draw Dialogue Box on top of everything else (if active)
-        self.dialogue_box.draw()
+        """Draws the topmost opaque scene and any overlays above it."""
+        first_visible = len(self.scene_stack) - 1
+        while first_visible > 0 and self.scene_stack[first_visible].is_overlay:
+            first_visible -= 1
+        for scene in self.scene_stack[first_visible:]:
+            scene.draw(self.screen)
         
         # Draw custom mouse cursor for relevant states
-        if self.game_state == STATE_INTRO_GENDER_SELECT or self.game_state == STATE_INTRO_NAME_INPUT:
+        if self.scene_stack[first_visible].shows_mouse_cursor:
             self.draw_mouse_cursor()
 
         pygame.display.flip() # Update the full screen
@@ -773,8 +1981,20 @@ class GameMock:
             
             self.clock.tick(FPS) # Maintain target FPS
             
+        if self.map_watcher:
+            self.map_watcher.stop()
+        self.telemetry.close() # Flush remaining telemetry events
+        self.map_loader.shutdown(wait=False, cancel_futures=True) # Drop pending neighbour prefetches
         pygame.quit() # Clean up Pygame resources
 
 if __name__ == '__main__':
-    game = GameMock()
+    if "--validate-maps" in sys.argv:
+        sys.exit(validate_maps_main())
+    if "--server" in sys.argv:
+        sys.exit(server_main())
+    if "--load-test" in sys.argv:
+        sys.exit(load_test_main(sys.argv[sys.argv.index("--load-test") + 1:]))
+    if "--export-maps" in sys.argv:
+        sys.exit(export_maps_main())
+    game = GameMock(dev_mode="--dev" in sys.argv)
     game.run()